@@ -0,0 +1,399 @@
+"""Benchmark suite for the hot paths of Mimpi Perang Artefak.
+
+Usage:
+    python benchmark.py                          # run and print a report
+    python benchmark.py --output baseline.json   # store results
+    python benchmark.py --baseline baseline.json # flag regressions
+
+Exits with status 1 when a benchmark is slower than the baseline by more
+than ``--threshold``.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+GAME_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mimpi perang artefak.py")
+BENCH_VERSION = 1
+SAMPLE_TARGET_NS = 50_000
+
+# New game, two fights, equip, save and exit; see smoke_check.
+SMOKE_SCRIPT = ["1", "Budi", "1", "2", "@serang", "@serang", "3", "1", "1", "@serang", "7", "8", "n", "3", "y", "n"]
+SMOKE_ERROR_MARKER = "Error dalam"
+
+# New game, 40 fights in Hutan Misterius and exit; see auto_minigame_check.
+MINIGAME_SCRIPT = ["1", "Budi", "1", "1"] + ["@serang"] * 40 + ["8", "n", "3", "y", "n"]
+MINIGAME_AUTO_MARKER = "Diselesaikan otomatis"
+
+# Loadout search over many sets that share pieces; see loadout_scaling_check.
+SCALING_ITEMS = 300
+SCALING_SET_PIECES = 45
+SCALING_SETS = 15
+SCALING_CEILING = 5.0
+
+
+def load_game_module():
+    spec = importlib.util.spec_from_file_location("mimpi_perang_artefak", GAME_FILE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@contextlib.contextmanager
+def quiet():
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def smoke_check(game):
+    """Play SMOKE_SCRIPT with output rendered and return the error lines it printed.
+
+    The game reports most failures through ``out`` instead of raising, so a
+    broken hot path would otherwise be timed as a fast error path.
+    """
+    output = io.StringIO()
+    game.RNG.seed(1)
+    try:
+        with game.headless_session(game.CommandScriptInput(SMOKE_SCRIPT), output=output):
+            game.run_game()
+    except game.InputExhausted:
+        pass
+    return [line for line in output.getvalue().splitlines() if SMOKE_ERROR_MARKER in line]
+
+
+def auto_minigame_check(game):
+    """Play MINIGAME_SCRIPT with every missed drop contested and return problems found.
+
+    Batch scripts auto-resolve minigames. A minigame that was played
+    instead would read the script's "1" lines as answers and leave the
+    script out of step, so the session must finish on the script's own
+    exit and print no error.
+    """
+    output = io.StringIO()
+    previous = game.MINIGAME_DROP_CHANCE
+    game.MINIGAME_DROP_CHANCE = 1.0
+    game.RNG.seed(1)
+    try:
+        with game.headless_session(game.CommandScriptInput(MINIGAME_SCRIPT), output=output):
+            game.run_game()
+    except game.InputExhausted:
+        return ["sesi tidak selesai"]
+    finally:
+        game.MINIGAME_DROP_CHANCE = previous
+    text = output.getvalue()
+    problems = [line for line in text.splitlines() if SMOKE_ERROR_MARKER in line]
+    if MINIGAME_AUTO_MARKER not in text:
+        problems.append("tidak ada mini-game yang diselesaikan otomatis")
+    return problems
+
+
+@contextlib.contextmanager
+def scaling_catalogue(game):
+    """Swap in SCALING_ITEMS synthetic artefaks and SCALING_SETS overlapping sets.
+
+    Every set draws three pieces from the same SCALING_SET_PIECES
+    artefaks, so the sets compete for the same equip slots. Yields the
+    synthetic artefak names.
+    """
+    rng = game.random.Random(1)
+    database = dict(game.ARTEFAK_DATABASE)
+    names = []
+    for index in range(SCALING_ITEMS):
+        name = f"Uji {index}"
+        database[name] = {"type": "senjata", "rarity": "biasa",
+                          "stats": {"attack": rng.randint(1, 30), "defense": rng.randint(0, 20)}}
+        names.append(name)
+    sets = {}
+    for index in range(SCALING_SETS):
+        sets[f"Set Uji {index}"] = {
+            "pieces": rng.sample(names[:SCALING_SET_PIECES], 3),
+            "tiers": [{"count": 2, "bonus": {"attack": rng.randint(5, 40)}},
+                      {"count": 3, "bonus": {"defense": rng.randint(10, 60)}}],
+        }
+    previous = game.ARTEFAK_DATABASE, game.ARTEFAK_SETS
+    game.ARTEFAK_DATABASE = database
+    game.ARTEFAK_SETS = game.ArtefakSetTable(game.normalize_artefak_sets(sets))
+    try:
+        yield names
+    finally:
+        game.ARTEFAK_DATABASE, game.ARTEFAK_SETS = previous
+
+
+def loadout_scaling_check(game):
+    """Return the seconds one search_loadouts call takes on scaling_catalogue.
+
+    The branch-and-bound only stays fast while its bound accounts for sets
+    competing for the same slots; a loose bound turns this into minutes.
+    """
+    with scaling_catalogue(game) as names:
+        start = time.perf_counter()
+        game.search_loadouts(names)
+        return time.perf_counter() - start
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(func, min_time, setup=None):
+    """Time ``func`` repeatedly and return per-op statistics in nanoseconds.
+
+    Fast operations are batched so every sample covers at least
+    SAMPLE_TARGET_NS, keeping timer overhead out of the percentiles.
+    ``setup`` runs untimed before each sample.
+    """
+    if setup:
+        setup()
+    start = time.perf_counter_ns()
+    func()
+    number = max(1, SAMPLE_TARGET_NS // max(1, time.perf_counter_ns() - start))
+
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while time.perf_counter() < deadline or len(samples) < 5:
+        if setup:
+            setup()
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter_ns() - start) / number)
+
+    samples.sort()
+    mean = sum(samples) / len(samples)
+    return {
+        "ops_per_sec": 1e9 / mean if mean else 0.0,
+        "mean_ns": mean,
+        "p50_ns": percentile(samples, 0.50),
+        "p95_ns": percentile(samples, 0.95),
+        "p99_ns": percentile(samples, 0.99),
+        "samples": len(samples),
+        "batch": number,
+    }
+
+
+def bench_get_total_stats(game, min_time):
+    player = game.create_sim_player()
+    return measure(player.get_total_stats, min_time)
+
+
+def bench_equip_churn(game, min_time):
+    player = game.create_sim_player(artefaks=[])
+    pieces = ["Kris", "Destar", "Baju Bodo", "Mandau", "Perisai Talawang"]
+    player.inventory.extend(pieces)
+
+    def churn():
+        for artefak in pieces:
+            player.equip_artefak(artefak)
+        for artefak in pieces:
+            player.unequip_artefak(artefak)
+    return measure(churn, min_time)
+
+
+def bench_set_bonus(game, min_time):
+    player = game.create_sim_player(artefaks=["Kris", "Destar", "Baju Bodo", "Mandau", "Perisai Talawang"])
+    return measure(player.get_artefak_set_bonus, min_time)
+
+
+def bench_encounter(game, min_time):
+    rng = game.random.Random(1)
+    locations = itertools.cycle(list(game.SPAWN_SAMPLERS))
+
+    def encounter():
+        enemy_name, level = game.roll_encounter(next(locations), rng)
+        game.create_enemy(enemy_name, level, rng)
+    return measure(encounter, min_time)
+
+
+def bench_battle_system(game, min_time):
+    player = game.create_sim_player()
+    game.RNG.seed(1)
+    state = {}
+
+    def setup():
+        player.current_hp = player.max_hp
+        player.mana = player.max_mana
+        state["enemy"] = game.Enemy("Bajak Laut", 3)
+
+    def fight():
+        with quiet():
+            game.battle_system(player, state["enemy"])
+
+    # Every prompt is answered with "1" (basic attack).
+    previous = game.set_input_provider(game.ScriptedInput(itertools.repeat("1")))
+    try:
+        return measure(fight, min_time, setup)
+    finally:
+        game.set_input_provider(previous)
+
+
+def bench_battle_ai(game, min_time):
+    """One ExpectimaxPolicy decision, cycling through the player turns of a fight."""
+    player = game.create_sim_player()
+    policy = game.ExpectimaxPolicy(time_budget=None)
+    states = []
+
+    def recording(state):
+        states.append(state.copy())
+        return policy(state)
+    game.run_battle(player, game.Enemy("Bajak Laut", 6), recording, game.random.Random(1), apply_result=False)
+    cycle = itertools.cycle(states)
+    return measure(lambda: policy(next(cycle)), min_time)
+
+
+def bench_loadout_search(game, min_time):
+    with scaling_catalogue(game) as names:
+        return measure(lambda: game.search_loadouts(names), min_time)
+
+
+def bench_save_load(game, min_time):
+    player = game.create_sim_player(name="Benchmark")
+    previous_store = game._save_stores.get(game.SAVE_DIR)
+    with tempfile.TemporaryDirectory() as save_dir:
+        game._save_stores[game.SAVE_DIR] = game.SaveStore(save_dir)
+
+        def round_trip():
+            with quiet():
+                game.save_game(player)
+                game.load_game(player.save_slot)
+        try:
+            return measure(round_trip, min_time)
+        finally:
+            if previous_store is None:
+                game._save_stores.pop(game.SAVE_DIR, None)
+            else:
+                game._save_stores[game.SAVE_DIR] = previous_store
+
+
+def bench_import(game, min_time):
+    """Time a cold import of the game module in a fresh interpreter."""
+    code = (
+        "import importlib.util, sys, time\n"
+        "start = time.perf_counter_ns()\n"
+        f"spec = importlib.util.spec_from_file_location('m', {GAME_FILE!r})\n"
+        "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+        "print(time.perf_counter_ns() - start)\n"
+    )
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while time.perf_counter() < deadline or len(samples) < 5:
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        samples.append(float(result.stdout.strip()))
+    samples.sort()
+    mean = sum(samples) / len(samples)
+    return {
+        "ops_per_sec": 1e9 / mean,
+        "mean_ns": mean,
+        "p50_ns": percentile(samples, 0.50),
+        "p95_ns": percentile(samples, 0.95),
+        "p99_ns": percentile(samples, 0.99),
+        "samples": len(samples),
+        "batch": 1,
+    }
+
+
+BENCHMARKS = {
+    "get_total_stats": bench_get_total_stats,
+    "equip_unequip_churn": bench_equip_churn,
+    "get_artefak_set_bonus": bench_set_bonus,
+    "encounter_generation": bench_encounter,
+    "battle_system_fight": bench_battle_system,
+    "battle_ai_decision": bench_battle_ai,
+    "loadout_search_sets": bench_loadout_search,
+    "save_load_round_trip": bench_save_load,
+    "module_import": bench_import,
+}
+
+
+def format_ns(ns):
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f}{unit}"
+    return f"{ns:.0f}ns"
+
+
+def compare(results, baseline, threshold):
+    """Return the names of benchmarks whose p50 regressed past ``threshold``."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("p50_ns"):
+            result["change"] = None
+            continue
+        change = result["p50_ns"] / base["p50_ns"] - 1
+        result["change"] = change
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def print_report(results, regressions):
+    print(f"{'benchmark':<24}{'ops/sec':>14}{'p50':>11}{'p95':>11}{'p99':>11}{'vs base':>10}")
+    for name, result in results.items():
+        change = result.get("change")
+        change_text = "" if change is None else f"{change:+.1%}"
+        flag = "  REGRESI" if name in regressions else ""
+        print(f"{name:<24}{result['ops_per_sec']:>14,.0f}{format_ns(result['p50_ns']):>11}"
+              f"{format_ns(result['p95_ns']):>11}{format_ns(result['p99_ns']):>11}{change_text:>10}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Mimpi Perang Artefak")
+    parser.add_argument("--min-time", type=float, default=1.0, help="detik minimum per benchmark")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="jalankan benchmark tertentu saja")
+    parser.add_argument("--output", metavar="FILE", help="simpan hasil ke FILE (JSON)")
+    parser.add_argument("--baseline", metavar="FILE", help="bandingkan dengan baseline JSON")
+    parser.add_argument("--threshold", type=float, default=0.20,
+                        help="perlambatan p50 (fraksi) yang dianggap regresi")
+    args = parser.parse_args(argv)
+
+    game = load_game_module()
+    errors = smoke_check(game) + auto_minigame_check(game)
+    if errors:
+        print("Smoke check gagal:")
+        for line in errors:
+            print(f"  {line}")
+        return 1
+    elapsed = loadout_scaling_check(game)
+    if elapsed > SCALING_CEILING:
+        print(f"Pencarian loadout terlalu lambat: {elapsed:.1f}s (batas {SCALING_CEILING:.0f}s)")
+        return 1
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        results[name] = BENCHMARKS[name](game, args.min_time)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.threshold)
+    print_report(results, regressions)
+
+    if args.output:
+        report = {
+            "version": BENCH_VERSION,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark mengalami regresi: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
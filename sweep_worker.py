@@ -0,0 +1,33 @@
+"""Process pool entry point for the balance sweep of Mimpi Perang Artefak.
+
+The game file's name is not an importable module name, so pool workers
+cannot unpickle references to its functions. Workers import this module
+by name instead; it loads the game file by path once per process, or
+reuses it when the process already runs it as the main module.
+"""
+import importlib.util
+import os
+import sys
+
+GAME_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mimpi perang artefak.py")
+
+_game = None
+
+
+def load_game():
+    global _game
+    if _game is None:
+        for name in ("__mp_main__", "__main__"):
+            module = sys.modules.get(name)
+            path = getattr(module, "__file__", None)
+            if path and os.path.abspath(path) == GAME_FILE:
+                _game = module
+                return _game
+        spec = importlib.util.spec_from_file_location("mimpi_perang_artefak", GAME_FILE)
+        _game = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(_game)
+    return _game
+
+
+def run_shard(shard, loadouts, n, policy_name, seed, max_turns):
+    return load_game()._sweep_shard(shard, loadouts, n, policy_name, seed, max_turns)